@@ -1,7 +1,30 @@
 #!/usr/bin/env python3
 import argparse
-import pandas as pd
-from datetime import datetime
+import os
+import re
+from collections import defaultdict
+import numpy as np
+
+# Opt-in multi-core execution: USE_MODIN=1 swaps in Modin's partitioned pandas
+USE_MODIN = os.environ.get("USE_MODIN", "").strip().lower() not in ("", "0", "false", "no", "off")
+if USE_MODIN:
+    import modin.config as mc
+    import modin.pandas as pd
+    if "MODIN_ENGINE" not in os.environ:
+        mc.Engine.put("ray")
+else:
+    import pandas as pd
+
+try:
+    import polars as pl  # Rust/Arrow multithreaded engine, used when available
+except ImportError:
+    pl = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv  # multithreaded streaming CSV reader when available
+except ImportError:
+    pa = pacsv = None
 
 # Expected input columns (from fix_to_csv.py):
 # OrderID,OrderTransactTime,ExecutionTransactTime,Symbol,Side,OrderQty,LimitPrice,AvgPx,LastMkt
@@ -11,18 +34,162 @@ TIME_FORMATS = [
     "%Y%m%d-%H:%M:%S",     # fallback if no fractional seconds
 ]
 
-def parse_fix_time(s: str):
-    """Parse FIX-style timestamps with a couple of common formats."""
-    if pd.isna(s):
-        return pd.NaT
-    s = str(s).strip()
-    for fmt in TIME_FORMATS:
-        try:
-            return datetime.strptime(s, fmt)
-        except ValueError:
-            continue
-    # If nothing worked, return NaT so we can drop the bad row
-    return pd.NaT
+# Last resort for rows both formats reject: stray whitespace, long fractions
+_TS_RE = re.compile(r"^\s*(\d{8})-(\d{1,2}):(\d{1,2}):(\d{1,2})(?:\.(\d{1,9}))?\s*$")
+
+REQUIRED_COLS = [
+    "OrderTransactTime", "ExecutionTransactTime",
+    "LimitPrice", "AvgPx", "LastMkt"
+]
+
+# Streaming granularity: rows per pandas chunk / bytes per Arrow block
+CHUNK_ROWS = 500_000
+CHUNK_BYTES = 32 << 20
+
+def _parse_fix_times_regex(s: pd.Series) -> pd.Series:
+    """Parse FIX-style timestamps with one vectorized regex pass and int64 arithmetic."""
+    parts = s.astype(str).str.extract(_TS_RE)
+    day = pd.to_datetime(parts[0], format="%Y%m%d", errors="coerce")
+    hh, mm, ss = (pd.to_numeric(parts[i]) for i in (1, 2, 3))
+    frac_ns = pd.to_numeric(parts[4].fillna("").str.ljust(9, "0"))
+
+    # Reject what strptime would (bad dates/clock fields); the rest is plain arithmetic
+    ok = (day.notna() & (hh < 24) & (mm < 60) & (ss < 60)).to_numpy()
+    ns = (
+        day[ok].to_numpy("datetime64[ns]").view("i8")
+        + ((hh[ok] * 3600 + mm[ok] * 60 + ss[ok]) * 1_000_000_000 + frac_ns[ok]).to_numpy("i8")
+    )
+    out = pd.Series(pd.NaT, index=s.index, dtype="datetime64[ns]")
+    out[ok] = ns.view("datetime64[ns]")
+    return out
+
+
+def parse_fix_times(s: pd.Series) -> pd.Series:
+    """Parse a column of FIX-style timestamps with a couple of common formats."""
+    # Fast path: one vectorized pass with the usual (fractional) format
+    dt = pd.to_datetime(s, format=TIME_FORMATS[0], errors="coerce")
+
+    # Retry only the rows that failed: the whole-seconds format, then the regex
+    dt = dt.astype("datetime64[ns]")
+    mask = dt.isna() & s.notna()
+    if mask.any():
+        dt.loc[mask] = pd.to_datetime(s[mask], format=TIME_FORMATS[1], errors="coerce")
+        mask = dt.isna() & s.notna()
+    if mask.any():
+        dt.loc[mask] = _parse_fix_times_regex(s[mask])
+    # Anything still unparsed stays NaT so we can drop the bad row
+    return dt
+
+
+def read_chunks(path: str):
+    """Yield the required columns of the input CSV as bounded-size DataFrames."""
+    # Prices are left to inference (float unless malformed) and coerced in chunk_sums
+    read_kwargs = dict(usecols=REQUIRED_COLS, dtype={"LastMkt": "category"})
+    if USE_MODIN:
+        # Modin partitions the frame across cores itself; hand it the whole file
+        yield pd.read_csv(path, **read_kwargs)
+    elif pacsv is not None:
+        reader = pacsv.open_csv(
+            path,
+            read_options=pacsv.ReadOptions(block_size=CHUNK_BYTES),
+            convert_options=pacsv.ConvertOptions(
+                include_columns=REQUIRED_COLS,
+                column_types={
+                    "OrderTransactTime": pa.string(),
+                    "ExecutionTransactTime": pa.string(),
+                    # Raw text; chunk_sums coerces so malformed prices drop the row
+                    "LimitPrice": pa.string(),
+                    "AvgPx": pa.string(),
+                    # Dictionary-encoded -> pandas Categorical, like the read_csv path
+                    "LastMkt": pa.dictionary(pa.int32(), pa.string()),
+                },
+                strings_can_be_null=True,
+            ),
+        )
+        for batch in reader:
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=CHUNK_ROWS, **read_kwargs)
+
+
+def chunk_sums(df: pd.DataFrame):
+    """
+    Returns per-LastMkt partial aggregates for one chunk:
+      (markets, counts, sum of price improvement, sum of exec speed secs)
+    """
+    # Parse timestamps -> datetime
+    order_dt = parse_fix_times(df["OrderTransactTime"])
+    exec_dt = parse_fix_times(df["ExecutionTransactTime"])
+
+    # Prices must be numeric (coerce errors to NaN then drop)
+    limit_px = pd.to_numeric(df["LimitPrice"], errors="coerce")
+    avg_px = pd.to_numeric(df["AvgPx"], errors="coerce")
+
+    # Drop rows with bad/missing times, LastMkt or prices
+    keep = (
+        order_dt.notna() & exec_dt.notna() & df["LastMkt"].notna()
+        & limit_px.notna() & avg_px.notna()
+    ).to_numpy()
+    df = df[keep]
+
+    # Compute execution speed in seconds (non-negative guard) on raw int64 nanoseconds
+    order_ns = order_dt[keep].to_numpy("datetime64[ns]").view("i8")
+    exec_ns = exec_dt[keep].to_numpy("datetime64[ns]").view("i8")
+    exec_secs = np.maximum(exec_ns - order_ns, 0) / 1e9
+
+    # Price improvement per fill: max(LimitPrice - AvgPx, 0)
+    price_impr = np.maximum(limit_px[keep].to_numpy("float64") - avg_px[keep].to_numpy("float64"), 0)
+
+    # Per-LastMkt sums via integer codes + bincount (LastMkt is categorical,
+    # so factorize reuses its codes instead of hashing strings)
+    codes, uniques = pd.factorize(df["LastMkt"])
+    n = len(uniques)
+    counts = np.bincount(codes, minlength=n)
+    sum_pi = np.bincount(codes, weights=price_impr, minlength=n)
+    sum_es = np.bincount(codes, weights=exec_secs, minlength=n)
+    return uniques, counts, sum_pi, sum_es
+
+
+def metrics_polars(path: str):
+    """Compute the per-LastMkt metrics with a lazy, streaming polars query."""
+    def fix_time(col: str):
+        # %.f makes the fractional part optional, covering both TIME_FORMATS
+        return (
+            pl.col(col).str.strip_chars()
+              .str.strptime(pl.Datetime("ns"), "%Y%m%d-%H:%M:%S%.f", strict=False)
+        )
+
+    return (
+        pl.scan_csv(
+            path,
+            schema_overrides={
+                "OrderTransactTime": pl.String,
+                "ExecutionTransactTime": pl.String,
+                "LimitPrice": pl.String,
+                "AvgPx": pl.String,
+                "LastMkt": pl.String,
+            },
+        )
+        .select(
+            fix_time("OrderTransactTime").alias("OrderDT"),
+            fix_time("ExecutionTransactTime").alias("ExecDT"),
+            # Malformed prices become null (then dropped) rather than failing the scan
+            pl.col("LimitPrice").cast(pl.Float64, strict=False),
+            pl.col("AvgPx").cast(pl.Float64, strict=False),
+            "LastMkt",
+        )
+        .drop_nulls(["OrderDT", "ExecDT", "LastMkt", "LimitPrice", "AvgPx"])
+        .group_by("LastMkt")
+        .agg(
+            (pl.col("LimitPrice") - pl.col("AvgPx")).clip(lower_bound=0)
+              .mean().alias("AvgPriceImprovement"),
+            ((pl.col("ExecDT") - pl.col("OrderDT")).dt.total_nanoseconds() / 1e9).clip(lower_bound=0)
+              .mean().alias("AvgExecSpeedSecs"),
+        )
+        .sort("LastMkt")
+        .collect(engine="streaming")
+    )
+
 
 def main():
     ap = argparse.ArgumentParser(description="Compute per-exchange execution metrics from CSV.")
@@ -30,52 +197,36 @@ def main():
     ap.add_argument("--output_metrics_file", required=True, help="Output CSV with aggregated metrics")
     args = ap.parse_args()
 
-    # Read
-    df = pd.read_csv(args.input_csv_file)
-
-    # Basic sanity: keep only rows with the required fields
-    required_cols = [
-        "OrderTransactTime", "ExecutionTransactTime",
-        "LimitPrice", "AvgPx", "LastMkt"
-    ]
-    missing = [c for c in required_cols if c not in df.columns]
+    # Basic sanity: the input must carry the required fields
+    header = pd.read_csv(args.input_csv_file, nrows=0).columns
+    missing = [c for c in REQUIRED_COLS if c not in header]
     if missing:
         raise ValueError(f"Missing required columns in input CSV: {missing}")
 
-    # Parse timestamps -> datetime
-    df["OrderDT"] = df["OrderTransactTime"].apply(parse_fix_time)
-    df["ExecDT"] = df["ExecutionTransactTime"].apply(parse_fix_time)
-
-    # Drop rows with bad/missing times or LastMkt
-    df = df.dropna(subset=["OrderDT", "ExecDT", "LastMkt"])
-
-    # Compute execution speed in seconds (non-negative guard)
-    exec_secs = (df["ExecDT"] - df["OrderDT"]).dt.total_seconds()
-    exec_secs = exec_secs.clip(lower=0)
-    df["ExecSpeedSecs"] = exec_secs
+    if pl is not None and not USE_MODIN:
+        metrics_polars(args.input_csv_file).write_csv(args.output_metrics_file)
+        return
 
-    # Price improvement per fill: max(LimitPrice - AvgPx, 0)
-    # (ensure numeric; coerce errors to NaN then drop)
-    df["LimitPrice"] = pd.to_numeric(df["LimitPrice"], errors="coerce")
-    df["AvgPx"] = pd.to_numeric(df["AvgPx"], errors="coerce")
-    df = df.dropna(subset=["LimitPrice", "AvgPx"])
-
-    df["PriceImprovement"] = (df["LimitPrice"] - df["AvgPx"]).clip(lower=0)
-
-    # Group by LastMkt and take means
-    agg = (
-        df.groupby("LastMkt", dropna=True)
-          .agg(
-              AvgPriceImprovement=("PriceImprovement", "mean"),
-              AvgExecSpeedSecs=("ExecSpeedSecs", "mean"),
-          )
-          .reset_index()
-    )
+    # Stream the file, folding each chunk into per-market accumulators
+    sums = defaultdict(lambda: np.zeros(2))   # LastMkt -> [sum PI, sum exec secs]
+    counts = defaultdict(int)                 # LastMkt -> number of fills
+    for chunk in read_chunks(args.input_csv_file):
+        markets, n, sum_pi, sum_es = chunk_sums(chunk)
+        for i, mkt in enumerate(markets):
+            sums[mkt] += (sum_pi[i], sum_es[i])
+            counts[mkt] += int(n[i])
 
-    # Order columns exactly as required
-    out = agg[["LastMkt", "AvgPriceImprovement", "AvgExecSpeedSecs"]]
+    # Order rows like groupby would (sorted market) and columns exactly as required
+    markets = sorted(sums)
+    totals = np.array([sums[m] for m in markets]).reshape(-1, 2)
+    n = np.array([counts[m] for m in markets], dtype="float64")
+    out = pd.DataFrame({
+        "LastMkt": markets,
+        "AvgPriceImprovement": totals[:, 0] / n,
+        "AvgExecSpeedSecs": totals[:, 1] / n,
+    })
 
-    # Write
+    # Write (one row per market, so the default writer is plenty)
     out.to_csv(args.output_metrics_file, index=False)
 
 if __name__ == "__main__":
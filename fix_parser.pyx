@@ -0,0 +1,48 @@
+# cython: language_level=3, boundscheck=False, wraparound=False
+"""
+Compiled drop-in for fix_to_csv.parse_fix_line.
+Build in place with:  python setup.py build_ext --inplace
+"""
+from libc.string cimport memchr
+
+
+cpdef dict parse_fix_line(bytes line):
+    """
+    Parse a single raw FIX message line into a dict of tag->value (both bytes).
+    Accepts delimiters: SOH (\x01), '|' or spaces (robust for classroom logs).
+    """
+    cdef dict msg = {}
+    cdef const char* buf
+    cdef const char* p
+    cdef Py_ssize_t n, pos, end, eq
+    cdef int d
+
+    line = line.strip()
+    n = len(line)
+    if n == 0:
+        return msg
+    buf = line
+
+    # Prefer SOH, else '|'; otherwise split on whitespace runs
+    if memchr(buf, 0x01, n) != NULL:
+        d = 0x01
+    elif memchr(buf, ord("|"), n) != NULL:
+        d = ord("|")
+    else:
+        for f in line.split():
+            k, sep, v = f.partition(b"=")
+            if sep:
+                msg[k] = v
+        return msg
+
+    # Walk the buffer once, slicing tag/value straight out of it
+    pos = 0
+    while pos < n:
+        p = <const char*>memchr(buf + pos, d, n - pos)
+        end = n if p == NULL else p - buf
+        p = <const char*>memchr(buf + pos, ord("="), end - pos)
+        if p != NULL:
+            eq = p - buf
+            msg[buf[pos:eq]] = buf[eq + 1:end]
+        pos = end + 1
+    return msg
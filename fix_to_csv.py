@@ -1,30 +1,36 @@
 #!/usr/bin/env python3
 import argparse
-import csv
-import re
-from typing import Dict, List, Tuple
-
-# Tags we care about
-TAG_MSGTYPE = "35"
-TAG_CLORDID = "11"
-TAG_ORIGCLORDID = "41"
-TAG_TRANSACTTIME = "60"
-TAG_SYMBOL = "55"
-TAG_SIDE = "54"
-TAG_ORDERQTY = "38"
-TAG_ORDTYPE = "40"
-TAG_PRICE = "44"         # Limit price on the order
-TAG_EXECTYPE = "150"
-TAG_ORDSTATUS = "39"
-TAG_AVGPX = "6"
-TAG_LASTMKT = "30"
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+# Tags we care about (raw bytes: lines are parsed undecoded straight off the file)
+TAG_MSGTYPE = b"35"
+TAG_CLORDID = b"11"
+TAG_ORIGCLORDID = b"41"
+TAG_TRANSACTTIME = b"60"
+TAG_SYMBOL = b"55"
+TAG_SIDE = b"54"
+TAG_ORDERQTY = b"38"
+TAG_ORDTYPE = b"40"
+TAG_PRICE = b"44"        # Limit price on the order
+TAG_EXECTYPE = b"150"
+TAG_ORDSTATUS = b"39"
+TAG_AVGPX = b"6"
+TAG_LASTMKT = b"30"
 
 # Values
-MSG_NEW_ORDER_SINGLE = "D"
-MSG_EXEC_REPORT = "8"
-EXECTYPE_FILL = "2"      # F (full fill) per assignment
-ORDSTATUS_FILLED = "2"
-ORDTYPE_LIMIT = "2"
+MSG_NEW_ORDER_SINGLE = b"D"
+MSG_EXEC_REPORT = b"8"
+EXECTYPE_FILL = b"2"     # F (full fill) per assignment
+ORDSTATUS_FILLED = b"2"
+ORDTYPE_LIMIT = b"2"
+
+# Raw MsgType fields, for pre-filtering lines without parsing them
+MSGTYPE_NOS_ATOM = TAG_MSGTYPE + b"=" + MSG_NEW_ORDER_SINGLE
+MSGTYPE_ER_ATOM = TAG_MSGTYPE + b"=" + MSG_EXEC_REPORT
 
 HEADER = [
     "OrderID",
@@ -38,9 +44,30 @@ HEADER = [
     "LastMkt",
 ]
 
-def parse_fix_line(line: str) -> Dict[str, str]:
+# Stored NewOrderSingle: (ClOrdID, TransactTime, Symbol, Side, OrderQty, Price)
+Order = Tuple[bytes, bytes, bytes, bytes, bytes, bytes]
+
+# Shared copies of low-cardinality values kept in stored orders (Symbol, Side).
+# sys.intern only accepts str, so raw bytes are deduplicated through this map.
+_INTERNED: Dict[bytes, bytes] = {}
+
+# Input read size: few large read() syscalls instead of many line-sized ones
+READ_BLOCK = 16 << 20
+
+# Files smaller than this are parsed in-process; process start-up would dominate
+PARALLEL_MIN_BYTES = 64 << 20
+
+# Shards per worker process: smaller shards keep each pickled result (and the
+# driver's working set) small while the pool stays busy
+SHARDS_PER_WORKER = 8
+
+# Output framing (matches csv.writer defaults) and rows per coalesced write()
+LINE_END = "\r\n"
+WRITE_BATCH_ROWS = 1 << 16
+
+def parse_fix_line(line: bytes) -> Dict[bytes, bytes]:
     """
-    Parse a single FIX message line into a dict of tag->value.
+    Parse a single raw FIX message line into a dict of tag->value (both bytes).
     Accepts delimiters: SOH (\x01), '|' or spaces (robust for classroom logs).
     """
     line = line.strip()
@@ -48,35 +75,117 @@ def parse_fix_line(line: str) -> Dict[str, str]:
         return {}
 
     # Prefer SOH; if not present fall back to '|' or spaces between tag=val
-    if "\x01" in line:
-        fields = line.split("\x01")
-    elif "|" in line:
-        fields = line.split("|")
+    if b"\x01" in line:
+        fields = line.split(b"\x01")
+    elif b"|" in line:
+        fields = line.split(b"|")
     else:
-        # Split on spaces but keep tag=value groups
-        fields = re.split(r"\s+", line)
+        # Split on whitespace runs (bytes.split, no regex) but keep tag=value groups
+        fields = line.split()
 
+    # C-level split/partition beat a Python-level find() loop per field
     msg = {}
     for f in fields:
-        if not f:
-            continue
-        if "=" not in f:
-            continue
-        k, v = f.split("=", 1)
-        msg[k] = v
+        k, sep, v = f.partition(b"=")
+        if sep:
+            msg[k] = v
     return msg
 
+try:
+    # Compiled scanner (fix_parser.pyx, see setup.py) when it has been built
+    from fix_parser import parse_fix_line
+except ImportError:
+    pass
+
 
-def load_orders_and_fills(lines: List[str]) -> Tuple[Dict[str, Dict[str, str]], List[Dict[str, str]]]:
+def iter_lines(path: str, start: int = 0, end: Optional[int] = None) -> Iterator[bytes]:
     """
-    Returns:
-      orders_by_id: map[ClOrdID] -> NewOrderSingle fields we need
-      fills: list of ExecutionReport (full fill) messages
+    Yield raw lines of a file, read in large blocks and split in C (no decode).
+    start/end restrict reading to a byte range that begins and ends on line boundaries.
     """
-    orders_by_id: Dict[str, Dict[str, str]] = {}
-    fills: List[Dict[str, str]] = []
+    # O_BINARY: on Windows byte offsets must match shard_bounds' binary open()
+    fd = os.open(path, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+    try:
+        os.lseek(fd, start, os.SEEK_SET)
+        remaining = -1 if end is None else end - start
+        carry = b""
+        while remaining:
+            block = os.read(fd, READ_BLOCK if remaining < 0 else min(READ_BLOCK, remaining))
+            if not block:
+                break
+            if remaining > 0:
+                remaining -= len(block)
+            data = carry + block
+            if b"\r" in data:
+                # Universal newlines, as text mode had: \r\n and bare \r end lines too
+                data = data.replace(b"\r\n", b"\n").replace(b"\r", b"\n")
+            lines = data.split(b"\n")
+            # Last piece may be a partial line; hold it for the next block
+            carry = lines.pop()
+            yield from lines
+        if carry:
+            yield carry
+    finally:
+        os.close(fd)
+
+
+def _intern(v: bytes) -> bytes:
+    """Return the shared copy of a repeated value (bytes analogue of sys.intern)."""
+    return _INTERNED.setdefault(v, v)
+
+
+def _text(b: bytes) -> str:
+    """Decode a raw FIX value for output, dropping undecodable bytes."""
+    return b.decode("utf-8", errors="ignore")
+
+
+def _fill_clid(ex: Dict[bytes, bytes]) -> Optional[bytes]:
+    # Prefer OrigClOrdID if provided; many venues echo ClOrdID on fills.
+    return ex.get(TAG_ORIGCLORDID) or ex.get(TAG_CLORDID)
+
+
+def build_row(orders_by_id: Dict[bytes, Order], ex: Dict[bytes, bytes]) -> Optional[List[str]]:
+    """Match a full-fill ExecutionReport to its stored order; returns the CSV row or None."""
+    clid = _fill_clid(ex)
+    if not clid:
+        return None
+
+    order = orders_by_id.get(clid)
+    if not order:
+        # No matching NOS; skip
+        return None
+
+    # Ensure LIMIT either on exec (some streams repeat tag 40) or on stored order
+    ordtype_exec = ex.get(TAG_ORDTYPE)
+    if ordtype_exec is not None and ordtype_exec != ORDTYPE_LIMIT:
+        return None
 
+    # Compose CSV row
+    order_clid, order_time, symbol, side, qty, price = order
+    return [
+        _text(order_clid),                                 # OrderID
+        _text(order_time),                                 # OrderTransactTime (from order)
+        _text(ex.get(TAG_TRANSACTTIME, b"")),              # ExecutionTransactTime (from exec)
+        _text(symbol or ex.get(TAG_SYMBOL, b"")),          # Symbol
+        _text(side or ex.get(TAG_SIDE, b"")),              # Side
+        _text(qty or ex.get(TAG_ORDERQTY, b"")),           # OrderQty
+        _text(price),                                      # LimitPrice
+        _text(ex.get(TAG_AVGPX, b"")),                     # AvgPx
+        _text(ex.get(TAG_LASTMKT, b"")),                   # LastMkt (exchange/broker)
+    ]
+
+
+def scan_fills(lines: Iterable[bytes], orders_by_id: Dict[bytes, Order]) -> Iterator[Union[List[str], Dict[bytes, bytes]]]:
+    """
+    Stream FIX lines, storing LIMIT orders into orders_by_id as they are read.
+    For each full fill, yields its CSV row if the order was already seen, or the
+    raw fill message itself if its ClOrdID is unknown so far.
+    """
     for line in lines:
+        # Cheap reject for heartbeats, market data, etc. before a full parse;
+        # the tag=value atom is the same whatever the field delimiter
+        if MSGTYPE_NOS_ATOM not in line and MSGTYPE_ER_ATOM not in line:
+            continue
         msg = parse_fix_line(line)
         if not msg:
             continue
@@ -89,80 +198,138 @@ def load_orders_and_fills(lines: List[str]) -> Tuple[Dict[str, Dict[str, str]],
             if not clid:
                 continue
             # Only store LIMIT orders
-            ordtype = msg.get(TAG_ORDTYPE)
-            if ordtype != ORDTYPE_LIMIT:
+            if msg.get(TAG_ORDTYPE) != ORDTYPE_LIMIT:
                 continue
-            # Store the useful fields
-            orders_by_id[clid] = {
-                TAG_CLORDID: clid,
-                TAG_TRANSACTTIME: msg.get(TAG_TRANSACTTIME, ""),
-                TAG_SYMBOL: msg.get(TAG_SYMBOL, ""),
-                TAG_SIDE: msg.get(TAG_SIDE, ""),
-                TAG_ORDERQTY: msg.get(TAG_ORDERQTY, ""),
-                TAG_PRICE: msg.get(TAG_PRICE, ""),
-                TAG_ORDTYPE: ordtype,
-            }
+            # Store the useful fields as one compact tuple (see Order)
+            orders_by_id[clid] = (
+                clid,
+                msg.get(TAG_TRANSACTTIME, b""),
+                _intern(msg.get(TAG_SYMBOL, b"")),
+                _intern(msg.get(TAG_SIDE, b"")),
+                msg.get(TAG_ORDERQTY, b""),
+                msg.get(TAG_PRICE, b""),
+            )
 
         # Execution Report (only full fills; ignore partials/rejects)
         elif msgtype == MSG_EXEC_REPORT:
             if msg.get(TAG_EXECTYPE) == EXECTYPE_FILL and msg.get(TAG_ORDSTATUS) == ORDSTATUS_FILLED:
-                fills.append(msg)
+                clid = _fill_clid(msg)
+                if clid and clid not in orders_by_id:
+                    # Order not seen in these lines; it may be in an earlier shard
+                    yield msg
+                    continue
+                row = build_row(orders_by_id, msg)
+                if row is not None:
+                    yield row
 
-    return orders_by_id, fills
 
+def iter_rows(lines: Iterable[bytes]) -> Iterator[List[str]]:
+    """
+    Stream FIX lines and yield one CSV row per matched full fill.
+    Only the LIMIT orders seen so far are kept (orders precede their fills in
+    FIX logs), so fills are written out as soon as they are read.
+    """
+    orders_by_id: Dict[bytes, Order] = {}
+    for item in scan_fills(lines, orders_by_id):
+        if isinstance(item, list):
+            yield item
 
-def build_rows(orders_by_id: Dict[str, Dict[str, str]], fills: List[Dict[str, str]]) -> List[List[str]]:
-    rows: List[List[str]] = []
 
-    for ex in fills:
-        # Prefer OrigClOrdID if provided; many venues echo ClOrdID on fills.
-        clid = ex.get(TAG_ORIGCLORDID) or ex.get(TAG_CLORDID)
-        if not clid:
-            continue
+def shard_bounds(path: str, n: int) -> List[Tuple[int, int]]:
+    """Split a file into up to n contiguous byte ranges snapped to line starts."""
+    size = os.path.getsize(path)
+    cuts = [0]
+    with open(path, "rb") as f:
+        for k in range(1, n):
+            pos = size * k // n
+            if pos <= cuts[-1]:
+                continue
+            # Step back one byte so a cut already on a line start stays there
+            f.seek(pos - 1)
+            f.readline()
+            cuts.append(f.tell())
+    cuts.append(size)
+    return [(a, b) for a, b in zip(cuts, cuts[1:]) if a < b]
 
-        order = orders_by_id.get(clid)
-        if not order:
-            # No matching NOS; skip
-            continue
 
-        # Ensure LIMIT either on exec (some streams repeat tag 40) or on stored order
-        ordtype_exec = ex.get(TAG_ORDTYPE)
-        if ordtype_exec is not None and ordtype_exec != ORDTYPE_LIMIT:
-            continue
+def scan_shard(path: str, start: int, end: int) -> Tuple[Dict[bytes, Order], List[Union[List[str], Dict[bytes, bytes]]]]:
+    """
+    Worker: scan one byte range of the FIX file.
+    Returns:
+      orders_by_id: LIMIT orders stored in this shard
+      items: in file order, CSV rows for fills matched within the shard and raw
+             fill messages whose order must come from an earlier shard
+    """
+    orders_by_id: Dict[bytes, Order] = {}
+    items = list(scan_fills(iter_lines(path, start, end), orders_by_id))
+    return orders_by_id, items
 
-        # Compose CSV row
-        row = [
-            order.get(TAG_CLORDID, ""),                    # OrderID
-            order.get(TAG_TRANSACTTIME, ""),               # OrderTransactTime (from order)
-            ex.get(TAG_TRANSACTTIME, ""),                  # ExecutionTransactTime (from exec)
-            order.get(TAG_SYMBOL, "") or ex.get(TAG_SYMBOL, ""),   # Symbol
-            order.get(TAG_SIDE, "") or ex.get(TAG_SIDE, ""),       # Side
-            order.get(TAG_ORDERQTY, "") or ex.get(TAG_ORDERQTY, ""),  # OrderQty
-            order.get(TAG_PRICE, ""),                      # LimitPrice
-            ex.get(TAG_AVGPX, ""),                         # AvgPx
-            ex.get(TAG_LASTMKT, ""),                       # LastMkt (exchange/broker)
-        ]
-        rows.append(row)
 
-    return rows
+def iter_rows_parallel(path: str, workers: int) -> Iterator[List[str]]:
+    """Same rows as iter_rows(iter_lines(path)), parsed by a pool of worker processes."""
+    shards = iter(shard_bounds(path, workers * SHARDS_PER_WORKER))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # At most `workers` shard results in flight; each is dropped once merged
+        pending = deque(pool.submit(scan_shard, path, a, b) for a, b in islice(shards, workers))
+        # Merge in file order: pending fills see exactly the orders that preceded their shard
+        orders_by_id: Dict[bytes, Order] = {}
+        while pending:
+            shard_orders, items = pending.popleft().result()
+            nxt = next(shards, None)
+            if nxt is not None:
+                pending.append(pool.submit(scan_shard, path, *nxt))
+            for item in items:
+                if isinstance(item, dict):
+                    item = build_row(orders_by_id, item)
+                    if item is None:
+                        continue
+                yield item
+            orders_by_id.update(shard_orders)
+            del shard_orders, items
+
+
+def _csv_cell(v: str) -> str:
+    """Quote a cell the way csv.writer (QUOTE_MINIMAL) would, if it needs it."""
+    if any(c in v for c in ',"\r\n'):
+        return '"' + v.replace('"', '""') + '"'
+    return v
+
+
+def write_rows(out, rows: Iterable[List[str]]) -> None:
+    """
+    Write CSV rows by plain string joins, flushing in large batches.
+    FIX values are almost always bare alphanumerics/numbers/timestamps, so the
+    per-cell quoting check only runs for the rare row that could need it.
+    """
+    buf: List[str] = []
+    for row in rows:
+        line = ",".join(row)
+        if line.count(",") != len(row) - 1 or '"' in line or "\r" in line:
+            line = ",".join(_csv_cell(v) for v in row)
+        buf.append(line)
+        if len(buf) >= WRITE_BATCH_ROWS:
+            out.write(LINE_END.join(buf) + LINE_END)
+            buf.clear()
+    if buf:
+        out.write(LINE_END.join(buf) + LINE_END)
 
 
 def main():
     ap = argparse.ArgumentParser(description="Convert FIX execution fills to CSV.")
     ap.add_argument("--input_fix_file", required=True, help="Path to input FIX log file")
     ap.add_argument("--output_csv_file", required=True, help="Path to output CSV")
+    ap.add_argument("--workers", type=int, default=1,
+                    help="Parser processes for inputs of 64 MiB or more (default: 1, in-process)")
     args = ap.parse_args()
 
-    with open(args.input_fix_file, "r", encoding="utf-8", errors="ignore") as f:
-        lines = f.readlines()
-
-    orders_by_id, fills = load_orders_and_fills(lines)
-    rows = build_rows(orders_by_id, fills)
+    if args.workers > 1 and os.path.getsize(args.input_fix_file) >= PARALLEL_MIN_BYTES:
+        rows = iter_rows_parallel(args.input_fix_file, args.workers)
+    else:
+        rows = iter_rows(iter_lines(args.input_fix_file))
 
-    with open(args.output_csv_file, "w", newline="", encoding="utf-8") as out:
-        writer = csv.writer(out)
-        writer.writerow(HEADER)
-        writer.writerows(rows)
+    with open(args.output_csv_file, "w", newline="", encoding="utf-8", buffering=1 << 20) as out:
+        out.write(",".join(HEADER) + LINE_END)
+        write_rows(out, rows)
 
 
 if __name__ == "__main__":
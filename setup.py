@@ -0,0 +1,13 @@
+"""Optional build of the compiled FIX parser used by fix_to_csv.py.
+
+    python setup.py build_ext --inplace
+
+fix_to_csv.py falls back to its pure-Python parser when the extension is absent.
+"""
+from setuptools import setup
+from Cython.Build import cythonize
+
+setup(
+    name="fix_parser",
+    ext_modules=cythonize("fix_parser.pyx"),
+)